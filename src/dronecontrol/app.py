@@ -5,7 +5,8 @@ import shlex
 
 from dronecontrol.dronemanager import DroneManager
 from dronecontrol.drone import Drone, DroneMAVSDK
-from dronecontrol.utils import common_formatter, check_cli_command_signatures
+from dronecontrol.utils import common_formatter, check_cli_command_signatures, filename_translation, logdir
+from dronecontrol.utils import start_task
 
 import textual.css.query
 from textual import on, events
@@ -57,27 +58,38 @@ Bar {
         self.dm: DroneManager = dm
         self.cur_drone: Drone | None = None
         self.logger = logger
-        asyncio.create_task(self._update_values())
+        # Handles to the status widgets, filled in once the screen is mounted so we don't query the DOM every update.
+        self._name_field: Static | None = None
+        self._address_field: Static | None = None
+        self._attitude_field: Static | None = None
+        self._battery_bar: ProgressBar | None = None
+        self._update_task = asyncio.create_task(self._update_values())
         self.dm.add_connect_func(self._add_drone)
         self.dm.add_remove_func(self._remove_drone)
 
+    def on_mount(self) -> None:
+        self._name_field = self.query_one("#name", expect_type=Static)
+        self._address_field = self.query_one("#address", expect_type=Static)
+        self._attitude_field = self.query_one("#attitude", expect_type=Static)
+        self._battery_bar = self.query_one("#battery", expect_type=ProgressBar)
+
     async def _update_values(self):
         while True:
             # Update fields
             try:
-                if self.cur_drone is not None:
-                    self.query_one("#name", expect_type=Static).update(f"{self.cur_drone.name}")
-                    self.query_one("#address", expect_type=Static).update(f"{self.cur_drone.drone_addr}")
-                    self.query_one("#attitude", expect_type=Static).update(f"{self.cur_drone.attitude}")
-                    self.query_one("#battery", expect_type=ProgressBar).update(
-                        progress=self.cur_drone.batteries[0].remaining)
-                else:
-                    self.query_one("#name", expect_type=Static).update("NAME: NO DRONE SELECTED")
-                    self.query_one("#address", expect_type=Static).update("ADDRESS: NO DRONE SELECTED")
-                    self.query_one("#attitude", expect_type=Static).update("ATTITUDE: NO DRONE SELECTED")
-                    self.query_one("#battery", expect_type=ProgressBar).update(progress=0)
-            except textual.app.NoMatches:
-                pass
+                if self._battery_bar is not None:  # Widgets are only available once the screen is mounted
+                    if self.cur_drone is not None:
+                        self._name_field.update(f"{self.cur_drone.name}")
+                        self._address_field.update(f"{self.cur_drone.drone_addr}")
+                        self._attitude_field.update(f"{self.cur_drone.attitude}")
+                        # Drones only report batteries some time after connecting, don't raise and log every update
+                        battery = self.cur_drone.batteries.get(0)
+                        self._battery_bar.update(progress=battery.remaining if battery is not None else 0)
+                    else:
+                        self._name_field.update("NAME: NO DRONE SELECTED")
+                        self._address_field.update("ADDRESS: NO DRONE SELECTED")
+                        self._attitude_field.update("ATTITUDE: NO DRONE SELECTED")
+                        self._battery_bar.update(progress=0)
             except Exception as e:
                 self.logger.error(f"Error updating values: {repr(e)}", exc_info=True)
             await asyncio.sleep(1/UPDATE_RATE)
@@ -213,7 +225,8 @@ class CommandScreen(Screen):
 
         flight_mode_parser = command_parsers.add_parser("mode", help="Change the drone(s) flight mode")
         flight_mode_parser.add_argument("mode", type=str,
-                                        help=f"Target flight mode. Must be one of {self.dm.drone_class.VALID_FLIGHTMODES}.")
+                                        help=f"Target flight mode. Must be one of "
+                                             f"{', '.join(sorted(self.dm.drone_class.VALID_FLIGHTMODES))}.")
         flight_mode_parser.add_argument("drones", type=str, nargs="+",
                                         help="Drone(s) to change flight mode on.")
         flight_mode_parser.add_argument("-s", "--schedule", action="store_true",
@@ -471,7 +484,8 @@ class CommandScreen(Screen):
                 tmp = asyncio.create_task(self.dm.stop_video(args.drone))
             elif args.command == "cam-zoom":
                 tmp = asyncio.create_task(self.dm.set_zoom(args.drone, args.zoom))
-            self.running_tasks.add(tmp)
+            if tmp is not None:
+                start_task(tmp, self.running_tasks)
         except Exception as e:
             self.logger.error(repr(e))
             self.logger.debug(repr(e), exc_info=True)
@@ -505,16 +519,7 @@ class CommandScreen(Screen):
         except Exception as e:
             self.logger.error(f"{repr(e)}", exc_info=True)
 
-    def _schedule_initialization_tasks(self):
-        asyncio.create_task(self._logging_setup())
-
-    async def _logging_setup(self):
-        output = None
-        while output is None:
-            try:
-                output = self.query_one("#output", expect_type=Log)
-            except textual.css.query.NoMatches:
-                await asyncio.sleep(0.1)
+    def _logging_setup(self, output: Log):
         handler = TextualLogHandler(output)
         handler.setLevel(logging.INFO)
         handler.setFormatter(pane_formatter)
@@ -523,7 +528,10 @@ class CommandScreen(Screen):
 
     def _on_mount(self, event: events.Mount) -> None:
         super()._on_mount(event)
-        self.query_one("#output", expect_type=Log).can_focus = False
+        # The log pane exists once we are mounted, so hook up logging here instead of waiting for it in a task
+        output = self.query_one("#output", expect_type=Log)
+        output.can_focus = False
+        self._logging_setup(output)
 
     def compose(self):
         status_string = ""
@@ -544,7 +552,6 @@ class CommandScreen(Screen):
             InputWithHistory(placeholder="Command line", id="cli")
         )
         yield Footer()
-        self._schedule_initialization_tasks()
 
 
 class DroneApp(App):
@@ -560,9 +567,7 @@ class DroneApp(App):
             self.logger = logging.getLogger("App")
             self.logger.setLevel(logging.DEBUG)
             filename = f"app_{datetime.datetime.now()}"
-            filename = filename.replace(":", "_").replace(".", "_") + ".log"
-            logdir = os.path.abspath("./logs")
-            os.makedirs(logdir, exist_ok=True)
+            filename = filename.translate(filename_translation) + ".log"
             file_handler = logging.FileHandler(os.path.join(logdir, filename))
             file_handler.setLevel(logging.DEBUG)
             file_handler.setFormatter(common_formatter)
@@ -6,7 +6,6 @@ import os.path
 from enum import Enum, auto
 import threading
 import platform
-import time
 from subprocess import Popen, DEVNULL
 from abc import ABC, abstractmethod
 
@@ -21,15 +20,13 @@ from mavsdk.offboard import PositionNedYaw, PositionGlobalYaw, VelocityNedYaw, A
 from mavsdk.manual_control import ManualControlError
 from mavsdk.camera import CameraError
 
-from dronecontrol.utils import dist_ned, dist_gps, relative_gps, heading_ned, heading_gps
-from dronecontrol.utils import parse_address, common_formatter, get_free_port
+from dronecontrol.utils import dist_ned, dist_gps, relative_gps, heading_ned, heading_gps, heading_difference
+from dronecontrol.utils import parse_address, common_formatter, get_free_port, filename_translation, logdir, start_task
 from dronecontrol.mavpassthrough import MAVPassthrough
 
 import logging
 
 _cur_dir = os.path.dirname(os.path.abspath(__file__))
-logdir = os.path.abspath("./logs")
-os.makedirs(logdir, exist_ok=True)
 _mav_server_file = os.path.join(_cur_dir, "mavsdk_server_bin.exe")
 
 
@@ -40,8 +37,23 @@ _mav_server_file = os.path.join(_cur_dir, "mavsdk_server_bin.exe")
 FlightMode = MAVSDKFlightMode
 FixType = MAVSDKFixType
 
+# Log level for status texts sent by the drone
+_STATUS_TEXT_LEVELS = {
+    StatusTextType.DEBUG: logging.DEBUG,
+    StatusTextType.INFO: logging.INFO,
+    StatusTextType.NOTICE: logging.INFO,
+    StatusTextType.WARNING: logging.WARNING,
+}
+
+# Camera capture flags, indexed by (ir << 1) | vis
+_PHOTO_FLAGS = (0, 8, 1, 9)
+_VIDEO_FLAGS = (0, 4, 2, 6)
+
 
 class Battery:
+
+    __slots__ = ("id", "remaining", "consumed", "voltage", "temperature")
+
     def __init__(self):
         self.id = None
         self.remaining = math.nan
@@ -62,10 +74,19 @@ class WayPointType(Enum):
     POS_GLOBAL = auto()             # array [lat, long, amsl, yaw]
 
 
+# Every waypoint type that can be sent as a MAVSDK offboard setpoint. Shared between drones and followers that pass
+# setpoints straight through.
+_OFFBOARD_SETPOINT_TYPES = frozenset({WayPointType.POS_NED,
+                                      WayPointType.POS_VEL_NED,
+                                      WayPointType.POS_VEL_ACC_NED,
+                                      WayPointType.VEL_NED,
+                                      WayPointType.POS_GLOBAL})
+
+
 class Drone(ABC, threading.Thread):
 
-    VALID_FLIGHTMODES = set()
-    VALID_SETPOINT_TYPES = set()
+    VALID_FLIGHTMODES = frozenset()
+    VALID_SETPOINT_TYPES = frozenset()
 
     def __init__(self, name, *args, log_to_file=True, **kwargs):
         threading.Thread.__init__(self)
@@ -73,6 +94,7 @@ class Drone(ABC, threading.Thread):
         self.drone_addr = None
         self.drone_ip = None
         self.action_queue: deque[tuple[asyncio.Coroutine, asyncio.Future]] = deque()
+        self._actions_queued = asyncio.Event()
         self.current_action: asyncio.Task | None = None
         self.should_stop = threading.Event()
         self.logger = logging.getLogger(name)
@@ -81,7 +103,7 @@ class Drone(ABC, threading.Thread):
         self.log_to_file = log_to_file
         if self.log_to_file:
             log_file_name = f"drone_{self.name}_{datetime.datetime.now()}"
-            log_file_name = log_file_name.replace(":", "_").replace(".", "_") + ".log"
+            log_file_name = log_file_name.translate(filename_translation) + ".log"
             file_handler = logging.FileHandler(os.path.join(logdir, log_file_name))
             file_handler.setLevel(logging.DEBUG)
             file_handler.setFormatter(common_formatter)
@@ -91,9 +113,12 @@ class Drone(ABC, threading.Thread):
         self.trajectory_generator: TrajectoryGenerator | None = None
 
         self.is_paused = False
+        self._resumed = asyncio.Event()
+        self._resumed.set()
         self.mav_conn: MAVPassthrough | None = None
         self.start()
-        asyncio.create_task(self._task_scheduler())
+        # Keep a reference, the event loop only holds weak references to tasks
+        self._scheduler_task = asyncio.create_task(self._task_scheduler())
 
     def run(self):
         while not self.should_stop:
@@ -103,7 +128,7 @@ class Drone(ABC, threading.Thread):
         while True:
             while len(self.action_queue) > 0:
                 if self.is_paused:
-                    await asyncio.sleep(0.1)
+                    await self._resumed.wait()
                 else:
                     action, fut = self.action_queue.popleft()
                     self.current_action = asyncio.create_task(action)
@@ -116,11 +141,14 @@ class Drone(ABC, threading.Thread):
                     except Exception as e:
                         fut.set_exception(e)
             else:
-                await asyncio.sleep(0.1)
+                # Queue is empty, sleep until schedule_task adds something
+                self._actions_queued.clear()
+                await self._actions_queued.wait()
 
     def schedule_task(self, coro) -> asyncio.Future:
         fut = asyncio.get_running_loop().create_future()
         self.action_queue.append((coro, fut))
+        self._actions_queued.set()
         return fut
 
     def execute_task(self, coro) -> asyncio.Future:
@@ -138,6 +166,7 @@ class Drone(ABC, threading.Thread):
 
         :return:
         """
+        self._scheduler_task.cancel()
         self.should_stop.set()
 
     def pause(self):
@@ -150,11 +179,13 @@ class Drone(ABC, threading.Thread):
         implement any of their own: When paused, drones will finish their current task and then wait until unpaused
         before beginning the next task."""
         self.is_paused = True
+        self._resumed.clear()
         self.logger.debug("Pausing...")
 
     def resume(self):
         """ Resume the current task. """
         self.is_paused = False
+        self._resumed.set()
         self.logger.debug("Resuming...")
 
     @property
@@ -259,9 +290,8 @@ class Drone(ABC, threading.Thread):
         return False
 
     def is_at_heading(self, target_heading, tolerance=1) -> bool:
-        target_heading = (target_heading + 180) % 360 - 180
         cur_heading = self.attitude[2]
-        if abs(cur_heading - target_heading) < tolerance:
+        if abs(heading_difference(cur_heading, target_heading)) < tolerance:
             return True
         return False
 
@@ -350,16 +380,27 @@ class Drone(ABC, threading.Thread):
 
 class DroneMAVSDK(Drone):
 
-    VALID_FLIGHTMODES = {"hold", "offboard", "return", "land", "takeoff", "position", "altitude"}
+    VALID_FLIGHTMODES = frozenset({"hold", "offboard", "return", "land", "takeoff", "position", "altitude"})
     # This attribute is for checking which flight modes can be changed into manually
-    VALID_SETPOINT_TYPES = {WayPointType.POS_NED,
-                            WayPointType.POS_VEL_NED,
-                            WayPointType.POS_VEL_ACC_NED,
-                            WayPointType.VEL_NED,
-                            WayPointType.POS_GLOBAL}
+    VALID_SETPOINT_TYPES = _OFFBOARD_SETPOINT_TYPES
     # What type of trajectory setpoints this classes fly_<> commands can follow. This limits what Trajectory generators
     # can be used.
 
+    _FLIGHTMODE_COMMANDS = {
+        # Flight mode: (MAVSDK command lookup, error type, flight mode reported once the change went through)
+        "hold":     (lambda system: system.action.hold, ActionError, FlightMode.HOLD),
+        "offboard": (lambda system: system.offboard.start, OffboardError, FlightMode.OFFBOARD),
+        "return":   (lambda system: system.action.return_to_launch, ActionError, FlightMode.RETURN_TO_LAUNCH),
+        "land":     (lambda system: system.action.land, ActionError, FlightMode.LAND),
+        "takeoff":  (lambda system: system.action.takeoff, ActionError, FlightMode.TAKEOFF),
+        "position": (lambda system: system.manual_control.start_position_control, ManualControlError,
+                     FlightMode.POSCTL),
+        "altitude": (lambda system: system.manual_control.start_altitude_control, ManualControlError,
+                     FlightMode.ALTCTL),
+    }
+    # Sign of the yaw steps for each spin direction
+    _SPIN_DIRECTIONS = {"cw": 1, "ccw": -1}
+
     def __init__(self, name, mavsdk_server_address: str | None = None, mavsdk_server_port: int = 50051):
         super().__init__(name)
         self.system: System | None = None
@@ -381,7 +422,8 @@ class DroneMAVSDK(Drone):
         self._attitude: np.ndarray = np.zeros((3,))         # Roll, pitch and yaw, with positives right up and right.
         self._heading: float = math.nan
         self._batteries: dict[int, Battery] = {}
-        self._running_tasks = []
+        self._running_tasks = set()
+        self.camera_id = 100
 
         # How often (per second) we request position information from the drone. The same interval is used by path
         # planning algorithms for their time resolution.
@@ -513,22 +555,24 @@ class DroneMAVSDK(Drone):
             return False
 
     async def _schedule_update_tasks(self) -> None:
-        self._running_tasks.append(asyncio.create_task(self._connect_check()))
-        self._running_tasks.append(asyncio.create_task(self._arm_check()))
-        self._running_tasks.append(asyncio.create_task(self._flightmode_check()))
-        self._running_tasks.append(asyncio.create_task(self._inair_check()))
-        self._running_tasks.append(asyncio.create_task(self._gps_check()))
-        self._running_tasks.append(asyncio.create_task(self._g_pos_check()))
-        self._running_tasks.append(asyncio.create_task(self._vel_rpos_check()))
-        self._running_tasks.append(asyncio.create_task(self._att_check()))
-        self._running_tasks.append(asyncio.create_task(self._battery_check()))
-        self._running_tasks.append(asyncio.create_task(self._status_check()))
+        start_task(self._connect_check(), self._running_tasks)
+        start_task(self._arm_check(), self._running_tasks)
+        start_task(self._flightmode_check(), self._running_tasks)
+        start_task(self._inair_check(), self._running_tasks)
+        start_task(self._gps_check(), self._running_tasks)
+        start_task(self._g_pos_check(), self._running_tasks)
+        start_task(self._vel_rpos_check(), self._running_tasks)
+        start_task(self._att_check(), self._running_tasks)
+        start_task(self._battery_check(), self._running_tasks)
+        start_task(self._status_check(), self._running_tasks)
 
     async def _configure_message_rates(self) -> None:
+        telemetry = self.system.telemetry
         try:
-            await self.system.telemetry.set_rate_position(self.position_update_rate)
-            await self.system.telemetry.set_rate_position_velocity_ned(self.position_update_rate)
-            await self.system.telemetry.set_rate_attitude_euler(self.position_update_rate)
+            # Independent requests, so send them all at once instead of waiting on each reply in turn.
+            await asyncio.gather(telemetry.set_rate_position(self.position_update_rate),
+                                 telemetry.set_rate_position_velocity_ned(self.position_update_rate),
+                                 telemetry.set_rate_attitude_euler(self.position_update_rate))
         except Exception as e:
             self.logger.warning(f"Couldn't set message rate!")
             self.logger.debug(f"{repr(e)}", exc_info=True)
@@ -560,38 +604,34 @@ class DroneMAVSDK(Drone):
 
     async def _g_pos_check(self):
         async for pos in self.system.telemetry.position():
-            self._position_g[0] = pos.latitude_deg
-            self._position_g[1] = pos.longitude_deg
-            self._position_g[2] = pos.absolute_altitude_m
-            self._position_g[3] = pos.relative_altitude_m
+            self._position_g[:] = (pos.latitude_deg, pos.longitude_deg, pos.absolute_altitude_m,
+                                   pos.relative_altitude_m)
 
     async def _vel_rpos_check(self):
         async for pos_vel in self.system.telemetry.position_velocity_ned():
-            self._velocity[0] = pos_vel.velocity.north_m_s
-            self._velocity[1] = pos_vel.velocity.east_m_s
-            self._velocity[2] = pos_vel.velocity.down_m_s
+            velocity = pos_vel.velocity
+            self._velocity[:] = (velocity.north_m_s, velocity.east_m_s, velocity.down_m_s)
+            # Position gets a new array, callers may hold on to the old one as a snapshot
             new_pos = np.array([pos_vel.position.north_m, pos_vel.position.east_m, pos_vel.position.down_m])
             self._position_ned = new_pos
 
     async def _att_check(self):
         async for att in self.system.telemetry.attitude_euler():
-            self._attitude[0] = att.roll_deg
-            self._attitude[1] = att.pitch_deg
-            self._attitude[2] = att.yaw_deg
+            self._attitude[:] = (att.roll_deg, att.pitch_deg, att.yaw_deg)
 
     async def _heading_check(self):
         async for heading in self.system.telemetry.heading():
             self._heading = heading.heading_deg
 
     async def _battery_check(self):
+        batteries = self._batteries
         async for battery in self.system.telemetry.battery():
             battery_id = battery.id
-            if battery_id in self._batteries:
-                own_battery = self._batteries[battery_id]
-            else:
+            own_battery = batteries.get(battery_id)
+            if own_battery is None:
                 own_battery = Battery()
                 own_battery.id = battery_id
-                self._batteries[battery_id] = own_battery
+                batteries[battery_id] = own_battery
             own_battery.consumed = battery.capacity_consumed_ah
             own_battery.remaining = battery.remaining_percent
             own_battery.voltage = battery.voltage_v
@@ -599,14 +639,8 @@ class DroneMAVSDK(Drone):
 
     async def _status_check(self):
         async for message in self.system.telemetry.status_text():
-            if message.type is StatusTextType.DEBUG:
-                self.logger.debug(f"{message.text}")
-            elif message.type in [StatusTextType.INFO, StatusTextType.NOTICE]:
-                self.logger.info(f"{message.text}")
-            elif message.type is StatusTextType.WARNING:
-                self.logger.warning(f"{message.text}")
-            else:
-                self.logger.error(f"{message.text}")
+            # Anything more severe than a warning is logged as an error
+            self.logger.log(_STATUS_TEXT_LEVELS.get(message.type, logging.ERROR), "%s", message.text)
 
     async def arm(self):
         timeout = 5
@@ -614,10 +648,11 @@ class DroneMAVSDK(Drone):
         await super().arm()
         result = await self._error_wrapper(self.system.action.arm, ActionError)
         if result and not isinstance(result, Exception):
-            start_time = time.time()
+            clock = asyncio.get_running_loop().time
+            start_time = clock()
             while not self.is_armed:
                 await asyncio.sleep(1 / self.position_update_rate)
-                if time.time() - start_time > timeout:
+                if clock() - start_time > timeout:
                     self.logger.warning("Arming timed out!")
                     return False
             self.logger.info("Armed!")
@@ -633,10 +668,11 @@ class DroneMAVSDK(Drone):
         await super().disarm()
         result = await self._error_wrapper(self.system.action.disarm, ActionError)
         if result and not isinstance(result, Exception):
-            start_time = time.time()
+            clock = asyncio.get_running_loop().time
+            start_time = clock()
             while self.is_armed:
                 await asyncio.sleep(1 / self.position_update_rate)
-                if time.time() - start_time > timeout:
+                if clock() - start_time > timeout:
                     self.logger.warning("Disarming timed out!")
                     return False
             self.logger.info("Disarmed!")
@@ -705,33 +741,15 @@ class DroneMAVSDK(Drone):
     async def change_flight_mode(self, flightmode: str, timeout: float = 5):
         self.logger.info(f"Changing flight mode to {flightmode}")
         await super().change_flight_mode(flightmode)
-        result = False
-        target_flight_mode = None
-        start_time = time.time()
-        if flightmode == "hold":
-            result = await self._error_wrapper(self.system.action.hold, ActionError)
-            target_flight_mode = FlightMode.HOLD
-        elif flightmode == "offboard":
-            result = await self._error_wrapper(self.system.offboard.start, OffboardError)
-            target_flight_mode = FlightMode.OFFBOARD
-        elif flightmode == "return":
-            result = await self._error_wrapper(self.system.action.return_to_launch, ActionError)
-            target_flight_mode = FlightMode.RETURN_TO_LAUNCH
-        elif flightmode == "land":
-            result = await self._error_wrapper(self.system.action.land, ActionError)
-            target_flight_mode = FlightMode.LAND
-        elif flightmode == "takeoff":
+        clock = asyncio.get_running_loop().time
+        start_time = clock()
+        try:
+            get_command, error_type, target_flight_mode = self._FLIGHTMODE_COMMANDS[flightmode]
+        except KeyError:
+            raise KeyError(f"{flightmode} is not a valid flightmode!") from None
+        if flightmode == "takeoff":
             self._can_takeoff()
-            result = await self._error_wrapper(self.system.action.takeoff, ActionError)
-            target_flight_mode = FlightMode.TAKEOFF
-        elif flightmode == "position":
-            result = await self._error_wrapper(self.system.manual_control.start_position_control, ManualControlError)
-            target_flight_mode = FlightMode.POSCTL
-        elif flightmode == "altitude":
-            result = await self._error_wrapper(self.system.manual_control.start_altitude_control, ManualControlError)
-            target_flight_mode = FlightMode.ALTCTL
-        else:
-            raise KeyError(f"{flightmode} is not a valid flightmode!")
+        result = await self._error_wrapper(get_command(self.system), error_type)
         if isinstance(result, Exception):
             self.logger.warning(f"Couldn't change flight mode due to exception {repr(result)}")
             return False
@@ -739,7 +757,7 @@ class DroneMAVSDK(Drone):
             self.logger.warning("Couldn't change flight mode due to a programmatic impossibility!")
             return False
         else:
-            while self.flightmode != target_flight_mode and time.time() < start_time + timeout:
+            while self.flightmode != target_flight_mode and clock() < start_time + timeout:
                 await asyncio.sleep(1/self.position_update_rate)
             if self.flightmode != target_flight_mode:
                 self.logger.warning("Drone accepted command, but flight mode change timed out! "
@@ -750,36 +768,52 @@ class DroneMAVSDK(Drone):
                 return True
 
     async def set_setpoint(self, setpoint: "Waypoint"):
-        setpoint_type = setpoint.type
-        if setpoint_type == WayPointType.POS_NED:
-            point_ned_yaw = PositionNedYaw(*setpoint.pos, setpoint.yaw)
-            return await self._error_wrapper(self.system.offboard.set_position_ned, OffboardError, point_ned_yaw)
-        elif setpoint_type == WayPointType.POS_VEL_NED:
-            point_ned_yaw = PositionNedYaw(*setpoint.pos, setpoint.yaw)
-            velocity_ned_yaw = VelocityNedYaw(*setpoint.vel, setpoint.yaw)
-            return await self._error_wrapper(self.system.offboard.set_position_velocity_ned, OffboardError,
-                                             point_ned_yaw, velocity_ned_yaw)
-        elif setpoint_type == WayPointType.POS_VEL_ACC_NED:
-            yaw = setpoint.yaw
-            point_ned_yaw = PositionNedYaw(*setpoint.pos, yaw)
-            velocity_ned_yaw = VelocityNedYaw(*setpoint.vel, yaw)
-            acc_ned = AccelerationNed(*setpoint.acc)
-            return await self._error_wrapper(self.system.offboard.set_position_velocity_acceleration_ned,
-                                             OffboardError,
-                                             point_ned_yaw,
-                                             velocity_ned_yaw,
-                                             acc_ned)
-        elif setpoint_type == WayPointType.VEL_NED:
-            vel_yaw = VelocityNedYaw(*setpoint.vel, setpoint.yaw)
-            return await self._error_wrapper(self.system.offboard.set_velocity_ned, OffboardError, vel_yaw)
-        elif setpoint_type == WayPointType.POS_GLOBAL:
-            latitude, longitude, amsl = setpoint.gps
-            alt_type = PositionGlobalYaw.AltitudeType.AMSL
-            position = PositionGlobalYaw(lat_deg=latitude, lon_deg=longitude, alt_m=amsl,
-                                         yaw_deg=setpoint.yaw, altitude_type=alt_type)
-            return await self._error_wrapper(self.system.offboard.set_position_global, OffboardError, position)
-        else:
-            raise RuntimeError("Invalid SetPointType!")
+        try:
+            send_setpoint = self._SETPOINT_SENDERS[setpoint.type]
+        except KeyError:
+            raise RuntimeError("Invalid SetPointType!") from None
+        return await send_setpoint(self, setpoint)
+
+    async def _set_setpoint_pos_ned(self, setpoint: "Waypoint"):
+        point_ned_yaw = PositionNedYaw(*setpoint.pos, setpoint.yaw)
+        return await self._error_wrapper(self.system.offboard.set_position_ned, OffboardError, point_ned_yaw)
+
+    async def _set_setpoint_pos_vel_ned(self, setpoint: "Waypoint"):
+        point_ned_yaw = PositionNedYaw(*setpoint.pos, setpoint.yaw)
+        velocity_ned_yaw = VelocityNedYaw(*setpoint.vel, setpoint.yaw)
+        return await self._error_wrapper(self.system.offboard.set_position_velocity_ned, OffboardError,
+                                         point_ned_yaw, velocity_ned_yaw)
+
+    async def _set_setpoint_pos_vel_acc_ned(self, setpoint: "Waypoint"):
+        yaw = setpoint.yaw
+        point_ned_yaw = PositionNedYaw(*setpoint.pos, yaw)
+        velocity_ned_yaw = VelocityNedYaw(*setpoint.vel, yaw)
+        acc_ned = AccelerationNed(*setpoint.acc)
+        return await self._error_wrapper(self.system.offboard.set_position_velocity_acceleration_ned,
+                                         OffboardError,
+                                         point_ned_yaw,
+                                         velocity_ned_yaw,
+                                         acc_ned)
+
+    async def _set_setpoint_vel_ned(self, setpoint: "Waypoint"):
+        vel_yaw = VelocityNedYaw(*setpoint.vel, setpoint.yaw)
+        return await self._error_wrapper(self.system.offboard.set_velocity_ned, OffboardError, vel_yaw)
+
+    async def _set_setpoint_pos_global(self, setpoint: "Waypoint"):
+        latitude, longitude, amsl = setpoint.gps
+        alt_type = PositionGlobalYaw.AltitudeType.AMSL
+        position = PositionGlobalYaw(lat_deg=latitude, lon_deg=longitude, alt_m=amsl,
+                                     yaw_deg=setpoint.yaw, altitude_type=alt_type)
+        return await self._error_wrapper(self.system.offboard.set_position_global, OffboardError, position)
+
+    # Setpoint type -> function sending it, called with (self, setpoint)
+    _SETPOINT_SENDERS = {
+        WayPointType.POS_NED: _set_setpoint_pos_ned,
+        WayPointType.POS_VEL_NED: _set_setpoint_pos_vel_ned,
+        WayPointType.POS_VEL_ACC_NED: _set_setpoint_pos_vel_acc_ned,
+        WayPointType.VEL_NED: _set_setpoint_vel_ned,
+        WayPointType.POS_GLOBAL: _set_setpoint_pos_global,
+    }
 
     def _can_do_in_air_commands(self):
         # TODO: Figure out how to do this with ardupilot. Currently the in_air detection seems very poor
@@ -802,11 +836,10 @@ class DroneMAVSDK(Drone):
         :param tolerance: How close we have to get to the heading before this function returns.
         :return:
         """
-        # Add 180, take modulo 360 and subtract 180 to get proper range
         if self.trajectory_follower.is_active:
             await self.trajectory_follower.deactivate()
         og_yaw = self.attitude[2]
-        dif_yaw = (target_yaw - og_yaw + 180) % 360 - 180
+        dif_yaw = heading_difference(target_yaw, og_yaw)
         time_required = abs(dif_yaw / yaw_rate)
         n_steps = math.ceil(time_required * self.position_update_rate)
         step_size = dif_yaw/n_steps
@@ -831,15 +864,17 @@ class DroneMAVSDK(Drone):
         :return:
         """
         await super().spin_at_rate(yaw_rate, duration, direction=direction)
+        try:
+            sign = self._SPIN_DIRECTIONS[direction]
+        except KeyError:
+            raise KeyError(f"{direction} is not a valid spin direction!") from None
         if self.trajectory_follower.is_active:
             await self.trajectory_follower.deactivate()
         pos = self.position_ned
         og_yaw = self.attitude[2]
         freq = 10
         n_steps = math.ceil(duration * freq)
-        step_size = yaw_rate / freq
-        if direction == "ccw":
-            step_size = - step_size
+        step_size = sign * yaw_rate / freq
         for i in range(n_steps):
             if not self.is_paused:
                 yaw = og_yaw + step_size*(i+1)
@@ -867,8 +902,7 @@ class DroneMAVSDK(Drone):
         # Check that we have one full set of coordinates and are in a flyable state
         if not self._can_do_in_air_commands():
             raise RuntimeError("Can't fly a landed or unarmed drone!")
-        assert ((x is not None and y is not None and z is not None)
-                or (lat is not None, long is not None, amsl is not None)), \
+        assert None not in (x, y, z) or None not in (lat, long, amsl), \
             "Must provide a full set of either NED or GPS coordinates!"
 
         # Check that we have a trajectory generator and follower who are compatible with each other and the drone
@@ -976,7 +1010,8 @@ class DroneMAVSDK(Drone):
         ema_alt_error = 0
         going_down = True
         old_alt = self.position_ned[2]
-        start_time = time.time()
+        clock = asyncio.get_running_loop().time
+        start_time = clock()
         target_pos = self._get_pos_ned_yaw()
         await self.set_setpoint(Waypoint(WayPointType.POS_NED, pos=target_pos[:3], yaw=target_pos[3]))
         if self._flightmode != FlightMode.OFFBOARD:
@@ -990,7 +1025,7 @@ class DroneMAVSDK(Drone):
         while going_down:
             cur_alt = self.position_ned[2]
             ema_alt_error = (cur_alt - old_alt) + 0.33 * ema_alt_error
-            if ema_alt_error < error_thresh and time.time() > start_time + min_time:
+            if ema_alt_error < error_thresh and clock() > start_time + min_time:
                 break
             old_alt = cur_alt
             target_pos[2] = cur_alt + 0.5
@@ -1024,6 +1059,8 @@ class DroneMAVSDK(Drone):
         if self.mav_conn:
             await self.mav_conn.stop()
             del self.mav_conn
+        for task in self._running_tasks:
+            task.cancel()
         self.system.__del__()
         if self._server_process:
             self._server_process.terminate()
@@ -1060,40 +1097,28 @@ class DroneMAVSDK(Drone):
     async def prepare(self):
         await self._error_wrapper(self.system.camera.prepare, CameraError)
 
-    async def take_picture(self, ir=True, vis=True):
-        flags = 0
-        if ir:
-            flags += 1
-        if vis:
-            flags += 8
-        await self.mav_conn.send_cmd_long(target_system=self.drone_system_id, target_component=100, cmd=2000,
-                                          param3=1.0,
-                                          param5=int(flags),
-                                          )
-
-    async def start_video(self, ir=True, vis=True):
-        flags = 0
-        if ir:
-            flags += 2
-        if vis:
-            flags += 4
-        await self.mav_conn.send_cmd_long(target_system=self.drone_system_id, target_component=100, cmd=2500,
-                                          param1=int(flags),
-                                          param2=2,
-                                          )
-
-    async def stop_video(self):
-        await self.mav_conn.send_cmd_long(target_system=self.drone_system_id, target_component=100, cmd=2501, )
-
-    async def get_settings(self):
-        await self.mav_conn.send_cmd_long(target_system=self.drone_system_id, target_component=100, cmd=521, )
-        await self.mav_conn.send_cmd_long(target_system=self.drone_system_id, target_component=100, cmd=522,
-                                          param1=1)
-
-    async def set_zoom(self, zoom):
-        await self.mav_conn.send_cmd_long(target_system=self.drone_system_id, target_component=100, cmd=203,
-                                          param2=zoom,
-                                          param5=0)
+    def _send_camera_cmd(self, cmd, camera_id=None, **params):
+        if camera_id is None:
+            camera_id = self.camera_id
+        self.mav_conn.send_cmd_long(target_system=self.drone_system_id, target_component=camera_id, cmd=cmd, **params)
+
+    async def take_picture(self, ir=True, vis=True, camera_id=None):
+        flags = _PHOTO_FLAGS[(bool(ir) << 1) | bool(vis)]
+        self._send_camera_cmd(2000, camera_id, param3=1.0, param5=int(flags))
+
+    async def start_video(self, ir=True, vis=True, camera_id=None):
+        flags = _VIDEO_FLAGS[(bool(ir) << 1) | bool(vis)]
+        self._send_camera_cmd(2500, camera_id, param1=int(flags), param2=2)
+
+    async def stop_video(self, camera_id=None):
+        self._send_camera_cmd(2501, camera_id)
+
+    async def get_settings(self, camera_id=None):
+        self._send_camera_cmd(521, camera_id)
+        self._send_camera_cmd(522, camera_id, param1=1)
+
+    async def set_zoom(self, zoom, camera_id=None):
+        self._send_camera_cmd(203, camera_id, param2=zoom, param5=0)
 
 
 class Waypoint:
@@ -1168,7 +1193,7 @@ class Waypoint:
 class TrajectoryGenerator(ABC):
 
     CAN_DO_GPS = False
-    WAYPOINT_TYPES = set()
+    WAYPOINT_TYPES = frozenset()
     """ These determine the type of intermediate waypoints a trajectory generator may produce"""
 
     def __init__(self, drone: Drone, logger, waypoint_type, use_gps=False):
@@ -1212,7 +1237,7 @@ class StaticWaypoints(TrajectoryGenerator):
     """
 
     CAN_DO_GPS = True
-    WAYPOINT_TYPES = {WayPointType.POS_NED, WayPointType.POS_GLOBAL}
+    WAYPOINT_TYPES = frozenset({WayPointType.POS_NED, WayPointType.POS_GLOBAL})
 
     def __init__(self, drone, logger, waypoint_type, use_gps=False):
         super().__init__(drone, logger=logger, waypoint_type=waypoint_type, use_gps=use_gps)
@@ -1239,8 +1264,8 @@ class TrajectoryFollower(ABC):
     """
 
     CAN_DO_GPS = False
-    SETPOINT_TYPES = set()
-    WAYPOINT_TYPES = set()
+    SETPOINT_TYPES = frozenset()
+    WAYPOINT_TYPES = frozenset()
 
     def __init__(self, drone: Drone, logger, dt, setpoint_type: WayPointType):
         assert setpoint_type in self.SETPOINT_TYPES, (f"Invalid setpoint type {setpoint_type} "
@@ -1277,32 +1302,43 @@ class TrajectoryFollower(ABC):
 
     async def follow(self):
         # Use current position as dummy waypoint in case trajectory generator can't produce any yet.
-        dummy_waypoint = Waypoint(WayPointType.POS_NED, pos=self.drone.position_ned,
-                                  vel=np.zeros((3,)), yaw=self.drone.attitude[2])
+        hold_waypoint = Waypoint(WayPointType.POS_NED, pos=self.drone.position_ned,
+                                 vel=np.zeros((3,)), yaw=self.drone.attitude[2])
         have_waypoints = False
-        waypoint = dummy_waypoint
+        waypoint = hold_waypoint
+        clock = asyncio.get_running_loop().time
+        next_tick = clock()
         while self.is_active:
             try:
                 if self.get_next_waypoint():
                     self.logger.debug("Getting new waypoint from trajectory generator...")
                     waypoint = self.drone.trajectory_generator.next()
-                    if not waypoint:
+                    if waypoint is None:
                         if have_waypoints:
-                            self.logger.debug("Generator no longer producing waypoints, using current position")
-                            # If we had waypoints, but lost them, use the current position as a dummy waypoint
+                            self.logger.debug("Generator no longer producing waypoints, holding current position")
+                            # If we had waypoints, but lost them, hold the position we were at when that happened
+                            hold_waypoint = Waypoint(WayPointType.POS_NED, pos=self.drone.position_ned,
+                                                     yaw=self.drone.attitude[2])
                             have_waypoints = False
                         else:  # Never had a waypoint
                             self.logger.debug("Don't have any waypoints from the generator yet, using current position")
-                        waypoint = Waypoint(WayPointType.POS_NED, pos=self.drone.position_ned,
-                                            yaw=self.drone.attitude[2])
+                        waypoint = hold_waypoint
                     else:
                         have_waypoints = True
                     self.current_waypoint = waypoint
                 await self.set_setpoint(waypoint)
-                await asyncio.sleep(self.dt)
             except Exception as e:
-                self.logger.error("Encountered an exception during following algorithm:", repr(e))
+                self.logger.error("Encountered an exception during following algorithm: %s", repr(e))
                 self.logger.debug(repr(e), exc_info=True)
+            # Sleep until the next tick rather than a full dt, so time spent sending setpoints doesn't add up.
+            # This also runs after an exception, so a persistent error doesn't spin the loop.
+            next_tick += self.dt
+            delay = next_tick - clock()
+            if delay < 0:
+                # We fell behind, don't try to catch up with a burst of setpoints
+                next_tick -= delay
+                delay = 0
+            await asyncio.sleep(delay)
 
     @abstractmethod
     def get_next_waypoint(self) -> bool:
@@ -1329,17 +1365,9 @@ class DirectSetpointFollower(TrajectoryFollower):
 
     CAN_DO_GPS = True
 
-    SETPOINT_TYPES = {WayPointType.POS_NED,
-                      WayPointType.POS_GLOBAL,
-                      WayPointType.VEL_NED,
-                      WayPointType.POS_VEL_NED,
-                      WayPointType.POS_VEL_ACC_NED}
+    SETPOINT_TYPES = _OFFBOARD_SETPOINT_TYPES
 
-    WAYPOINT_TYPES = {WayPointType.POS_NED,
-                      WayPointType.POS_GLOBAL,
-                      WayPointType.VEL_NED,
-                      WayPointType.POS_VEL_NED,
-                      WayPointType.POS_VEL_ACC_NED}
+    WAYPOINT_TYPES = _OFFBOARD_SETPOINT_TYPES
 
     def __init__(self, drone: Drone, logger, dt, setpoint_type):
         super().__init__(drone, logger, dt, setpoint_type)
@@ -1361,8 +1389,8 @@ class VelocityControlFollower(TrajectoryFollower):
     """
     # TODO: Figure out better way to handle yaw rate
 
-    SETPOINT_TYPES = {WayPointType.VEL_NED}
-    WAYPOINT_TYPES = {WayPointType.POS_NED}
+    SETPOINT_TYPES = frozenset({WayPointType.VEL_NED})
+    WAYPOINT_TYPES = frozenset({WayPointType.POS_NED})
     CAN_DO_GPS = False
 
     def __init__(self, drone, logger, dt, max_vel_h=1.0, max_vel_z=0.5, max_acc_h=0.5, max_acc_z=0.25, max_yaw_rate=60):
@@ -1377,6 +1405,9 @@ class VelocityControlFollower(TrajectoryFollower):
         self.fudge_xy = 1
         self.fudge_z = 1
 
+        # Scratch buffer for the velocity setpoint, Waypoint copies the values so it can be reused every tick.
+        self._vel_setpoint = np.zeros((3,))
+
         attr_string = "\n   ".join(["{}: {}".format(key, value) for key, value in self.__dict__.items()])
         self.logger.debug(f"Initialized trajectory follower {self.__class__.__name__}:\n   {attr_string}")
 
@@ -1392,15 +1423,22 @@ class VelocityControlFollower(TrajectoryFollower):
 
         :return:
         """
+        # Read everything we need from the drone and waypoint once
+        drone = self.drone
+        cur_pos = drone.position_ned
+        cur_vel = drone.velocity
+        target_pos = waypoint.pos
+        dt = self.dt
+
         # Yaw
         target_yaw = waypoint.yaw
-        if self.drone.is_at_pos(waypoint.pos, tolerance=1):
+        if drone.is_at_pos(target_pos, tolerance=1):
             temp_yaw_target = target_yaw
         else:
-            temp_yaw_target = heading_ned(self.drone.position_ned, waypoint.pos)
-        cur_yaw = self.drone.attitude[2]
-        dif_yaw = (temp_yaw_target - cur_yaw + 180) % 360 - 180
-        step_size = self.max_yaw_rate * self.dt * self.fudge_yaw
+            temp_yaw_target = heading_ned(cur_pos, target_pos)
+        cur_yaw = drone.attitude[2]
+        dif_yaw = heading_difference(temp_yaw_target, cur_yaw)
+        step_size = self.max_yaw_rate * dt * self.fudge_yaw
         if abs(dif_yaw) < step_size:
             yaw = temp_yaw_target
         else:
@@ -1410,24 +1448,27 @@ class VelocityControlFollower(TrajectoryFollower):
                 yaw = cur_yaw - step_size
 
         # Vertical movement
-        cur_z = self.drone.position_ned[2]
-        cur_speed_z = abs(self.drone.velocity[2])
-        dist_z = abs(waypoint.pos[2] - cur_z)
-        speed_z_lim = min(math.sqrt(abs(2 * self.max_acc_z * dist_z)), self.max_vel_z)
-        speed_z = min(cur_speed_z + self.max_acc_z * self.dt * self.fudge_z, speed_z_lim)
-        vel_z = speed_z if waypoint.pos[2] - cur_z > 0 else -speed_z  # Speed is not velocity -> manually set sign
-
-        # Horizontal
-        cur_xy = self.drone.position_ned[:2]
-        dist_xy = dist_ned(waypoint.pos[:2], cur_xy)
-        cur_vel_xy = self.drone.velocity[:2]
-        cur_speed_xy = np.sqrt(cur_vel_xy.dot(cur_vel_xy))
-        dist_xy_v = waypoint.pos[:2] - cur_xy
-        speed_xy_limit = min(math.sqrt(abs(2 * self.max_acc_h * dist_xy)), self.max_vel_h)
-        speed_xy = min(cur_speed_xy + self.max_acc_h * self.dt * self.fudge_xy, speed_xy_limit)
-        dir_xy = math.atan2(dist_xy_v[1], dist_xy_v[0])
+        cur_z = cur_pos[2]
+        cur_speed_z = abs(cur_vel[2])
+        dist_z = abs(target_pos[2] - cur_z)
+        speed_z_lim = min(math.sqrt(2 * self.max_acc_z * dist_z), self.max_vel_z)
+        speed_z = min(cur_speed_z + self.max_acc_z * dt * self.fudge_z, speed_z_lim)
+        vel_z = speed_z if target_pos[2] - cur_z > 0 else -speed_z  # Speed is not velocity -> manually set sign
+
+        # Horizontal, plain float math since numpy overhead dominates for 2-vectors
+        dist_n = float(target_pos[0] - cur_pos[0])
+        dist_e = float(target_pos[1] - cur_pos[1])
+        dist_xy = math.hypot(dist_n, dist_e)
+        cur_speed_xy = math.hypot(cur_vel[0], cur_vel[1])
+        speed_xy_limit = min(math.sqrt(2 * self.max_acc_h * dist_xy), self.max_vel_h)
+        speed_xy = min(cur_speed_xy + self.max_acc_h * dt * self.fudge_xy, speed_xy_limit)
+        dir_xy = math.atan2(dist_e, dist_n)
         vel_x = math.cos(dir_xy) * speed_xy
         vel_y = math.sin(dir_xy) * speed_xy
 
-        vel_yaw_setpoint = Waypoint(WayPointType.VEL_NED, vel=np.asarray([vel_x, vel_y, vel_z]), yaw=yaw)
-        await self.drone.set_setpoint(vel_yaw_setpoint)
+        vel = self._vel_setpoint
+        vel[0] = vel_x
+        vel[1] = vel_y
+        vel[2] = vel_z
+        vel_yaw_setpoint = Waypoint(WayPointType.VEL_NED, vel=vel, yaw=yaw)
+        await drone.set_setpoint(vel_yaw_setpoint)
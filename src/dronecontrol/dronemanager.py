@@ -5,7 +5,7 @@ import socket
 from asyncio.exceptions import TimeoutError, CancelledError
 
 from dronecontrol.drone import Drone, parse_address
-from dronecontrol.utils import common_formatter, get_free_port
+from dronecontrol.utils import common_formatter, get_free_port, filename_translation, logdir
 
 import logging
 
@@ -47,11 +47,13 @@ class DroneManager:
         # protect those writes/deletes with this lock. Read only functions can ignore it.
         self.drone_lock = asyncio.Lock()
 
-        self._on_drone_removal_coros = set()
-        self._on_drone_connect_coros = set()
+        # Callbacks are kept as tuples in registration order. They are rarely added to, but iterated on every connection
+        # or removal.
+        self._on_drone_removal_coros = ()
+        self._on_drone_connect_coros = ()
 
-        self._on_plugin_load_coros = set()
-        self._on_plugin_unload_coros = set()
+        self._on_plugin_load_coros = ()
+        self._on_plugin_unload_coros = ()
         self.plugins = set()
 
         self.system_id = 246
@@ -61,9 +63,7 @@ class DroneManager:
             self.logger = logging.getLogger("Manager")
             self.logger.setLevel(logging.DEBUG)
             filename = f"manager_{datetime.datetime.now()}"
-            filename = filename.replace(":", "_").replace(".", "_") + ".log"
-            logdir = os.path.abspath("./logs")
-            os.makedirs(logdir, exist_ok=True)
+            filename = filename.translate(filename_translation) + ".log"
             file_handler = logging.FileHandler(os.path.join(logdir, filename))
             file_handler.setLevel(logging.DEBUG)
             file_handler.setFormatter(common_formatter)
@@ -80,7 +80,7 @@ class DroneManager:
         try:
             scheme, parsed_addr, parsed_port = parse_address(string=drone_address)
         except Exception as e:
-            self.logger.warning("Couldn't connect due to an exception: ", repr(e))
+            self.logger.warning("Couldn't connect due to an exception: %s", repr(e))
             self.logger.debug(repr(e), exc_info=True)
             return False
         if scheme == "serial":
@@ -126,7 +126,7 @@ class DroneManager:
                     self.drones[name] = drone
                     for func in self._on_drone_connect_coros:
                         try:
-                            await asyncio.create_task(func(name, drone))
+                            await func(name, drone)
                         except Exception as e:
                             self.logger.error(f"Failed post-connection process: {repr(e)}")
                             self.logger.debug(repr(e), exc_info=True)
@@ -143,7 +143,7 @@ class DroneManager:
                     await self._remove_drone_object(name, drone)
                 return False
             except Exception as e:
-                self.logger.info("Couldn't connect to the drone due to an exception: ", repr(e))
+                self.logger.info("Couldn't connect to the drone due to an exception: %s", repr(e))
                 self.logger.debug(repr(e), exc_info=True)
                 if drone is not None:
                     await self._remove_drone_object(name, drone)
@@ -152,30 +152,34 @@ class DroneManager:
     async def disconnect(self, names, force=False):
         self.logger.info(f"Disconnecting {names} ...")
         async with self.drone_lock:
-            for name in names:
-                try:
-                    drone = self.drones[name]
-                except KeyError:
-                    continue
-                try:
-                    disconnected = await drone.disconnect(force=force)
-                except Exception as e:
-                    disconnected = False
-                    self.logger.error(f"An error occurred during disconnect for {name}")
-                    self.logger.debug(repr(e), exc_info=True)
-                if disconnected:
-                    await self._remove_drone_object(name, drone)
-                    self.logger.info(f"Disconnected {name}")
+            # Repeated names would otherwise disconnect the same drone twice at once
+            await asyncio.gather(*[self._disconnect_drone(name, force=force) for name in dict.fromkeys(names)])
+
+    async def _disconnect_drone(self, name, force=False):
+        try:
+            drone = self.drones[name]
+        except KeyError:
+            return
+        try:
+            disconnected = await drone.disconnect(force=force)
+        except Exception as e:
+            disconnected = False
+            self.logger.error(f"An error occurred during disconnect for {name}")
+            self.logger.debug(repr(e), exc_info=True)
+        if disconnected:
+            await self._remove_drone_object(name, drone)
+            self.logger.info(f"Disconnected {name}")
 
     async def _single_drone_action(self, action, name, start_string, *args, schedule=False, **kwargs):
         try:
-            coro = action(self.drones[name], *args, **kwargs)
+            drone = self.drones[name]
+            coro = action(drone, *args, **kwargs)
             if schedule:
                 self.logger.info("Queuing action: " + start_string)
-                result = self.drones[name].schedule_task(coro)
+                result = drone.schedule_task(coro)
             else:
                 self.logger.info(start_string)
-                result = self.drones[name].execute_task(coro)
+                result = drone.execute_task(coro)
             await result
             if isinstance(result, Exception):
                 self.logger.error(f"Couldn't execute command due to: {str(result)}")
@@ -188,13 +192,15 @@ class DroneManager:
 
     async def _multiple_drone_action(self, action, names, start_string, *args, schedule=False, **kwargs):
         try:
-            coros = [action(self.drones[name], *args, **kwargs) for name in names]
+            # Look up all drones before creating any coroutines, so a bad name doesn't leave some of them unawaited
+            drones = [self.drones[name] for name in names]
+            coros = [action(drone, *args, **kwargs) for drone in drones]
             if schedule:
                 self.logger.info("Queuing action: " + start_string.format(names))
-                results = [self.drones[name].schedule_task(coros[i]) for i, name in enumerate(names)]
+                results = [drone.schedule_task(coro) for drone, coro in zip(drones, coros)]
             else:
                 self.logger.info(start_string.format(names))
-                results = [self.drones[name].execute_task(coros[i]) for i, name in enumerate(names)]
+                results = [drone.execute_task(coro) for drone, coro in zip(drones, coros)]
             results = await asyncio.gather(*results, return_exceptions=True)
             for i, result in enumerate(results):
                 if isinstance(result, Exception):
@@ -309,20 +315,22 @@ class DroneManager:
             self.drones.pop(name)
         except KeyError:
             pass
-        for func in self._on_drone_removal_coros:
-            try:
-                await asyncio.create_task(func(name))
-            except Exception as e:
-                self.logger.debug(repr(e), exc_info=True)
+        results = await asyncio.gather(*[func(name) for func in self._on_drone_removal_coros],
+                                       return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
+                self.logger.debug(repr(result), exc_info=result)
         if drone is not None:
             await drone.stop_execution()
             del drone
 
     def add_remove_func(self, func):
-        self._on_drone_removal_coros.add(func)
+        if func not in self._on_drone_removal_coros:
+            self._on_drone_removal_coros += (func,)
 
     def add_connect_func(self, func):
-        self._on_drone_connect_coros.add(func)
+        if func not in self._on_drone_connect_coros:
+            self._on_drone_connect_coros += (func,)
 
 # PLUGINS ##############################################################################################################
 
@@ -333,10 +341,12 @@ class DroneManager:
         return self.plugins
 
     def add_plugin_load_func(self, func):
-        self._on_plugin_load_coros.add(func)
+        if func not in self._on_plugin_load_coros:
+            self._on_plugin_load_coros += (func,)
 
     def add_plugin_unload_func(self, func):
-        self._on_drone_connect_coros.add(func)
+        if func not in self._on_plugin_unload_coros:
+            self._on_plugin_unload_coros += (func,)
 
     async def load_plugin(self, plugin_name):
         # Create plugin instance, add plugin commands (how???)
@@ -352,10 +362,12 @@ class DroneManager:
         setattr(self, plugin_name, plugin)
         await plugin.start()
         self.logger.debug(f"Performing callbacks for plugin loading...")
-        for func in self._on_plugin_load_coros:
-            res = await asyncio.create_task(func(plugin_name, plugin))
-            if isinstance(res, Exception):
+        results = await asyncio.gather(*[func(plugin_name, plugin) for func in self._on_plugin_load_coros],
+                                       return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
                 self.logger.warning("Couldn't load a callback plugin.")
+                self.logger.debug(repr(result), exc_info=result)
         self.logger.info(f"Completed loading Plugin {plugin_name}!")
 
     async def unload_plugin(self, plugin_name):
@@ -365,10 +377,8 @@ class DroneManager:
         self.logger.info(f"Unloading plugin {plugin_name}")
         self.plugins.remove(plugin_name)
         plugin = getattr(self, plugin_name)
-        unload_tasks = set()
-        for func in self._on_plugin_unload_coros:
-            unload_tasks.add(func(plugin_name, plugin))
-        await asyncio.gather(*unload_tasks, return_exceptions=True)
+        await asyncio.gather(*[func(plugin_name, plugin) for func in self._on_plugin_unload_coros],
+                             return_exceptions=True)
         await plugin.close()
         delattr(self, plugin_name)
 
@@ -7,7 +7,7 @@ from mavsdk.gimbal import ControlMode as MAVControlMode
 from mavsdk.gimbal import GimbalMode as MAVGimbalMode
 
 from dronecontrol.plugins import Plugin
-from dronecontrol.utils import relative_gps
+from dronecontrol.utils import relative_gps, start_task
 
 
 # TODO: Multiple gimbals per drone
@@ -16,6 +16,11 @@ from dronecontrol.utils import relative_gps
 ControlMode = MAVControlMode
 GimbalMode = MAVGimbalMode
 
+_GIMBAL_MODES = {
+    "follow": GimbalMode.YAW_FOLLOW,
+    "lock": GimbalMode.YAW_LOCK,
+}
+
 
 class GimbalPlugin(Plugin):
     
@@ -86,6 +91,8 @@ class GimbalPlugin(Plugin):
 
 class Gimbal:
 
+    __slots__ = ("logger", "drone", "roll", "pitch", "yaw", "primary_control", "secondary_control", "running_tasks")
+
     def __init__(self, logger, drone):
         self.logger = logger
         self.drone = drone
@@ -99,8 +106,8 @@ class Gimbal:
         self._start_background_tasks()
 
     def _start_background_tasks(self):
-        self.running_tasks.add(asyncio.create_task(self._check_gimbal_attitude()))
-        self.running_tasks.add(asyncio.create_task(self._check_gimbal_control()))
+        start_task(self._check_gimbal_attitude(), self.running_tasks)
+        start_task(self._check_gimbal_control(), self.running_tasks)
 
     async def close(self):
         for task in self.running_tasks:
@@ -144,11 +151,8 @@ class Gimbal:
         await self._error_wrapper(self.drone.system.gimbal.set_angles, roll, pitch, yaw)
 
     async def set_gimbal_mode(self, mode):
-        assert mode in ["follow", "lock"]
-        if mode == "follow":
-            await self._error_wrapper(self.drone.system.gimbal.set_mode, GimbalMode.YAW_FOLLOW)
-        elif mode == "lock":
-            await self._error_wrapper(self.drone.system.gimbal.set_mode, GimbalMode.YAW_LOCK)
+        assert mode in _GIMBAL_MODES
+        await self._error_wrapper(self.drone.system.gimbal.set_mode, _GIMBAL_MODES[mode])
 
     async def _error_wrapper(self, func, *args, **kwargs):
         try:
@@ -7,11 +7,23 @@ import asyncio
 
 from pymavlink import mavutil
 
-from dronecontrol.utils import common_formatter
+from dronecontrol.utils import common_formatter, filename_translation, logdir, start_task
 
 # TODO: Routing between multiple GCS so we can have my app and QGroundControl connected at the same time
 # TODO: Implement sending as drone/drone components
 
+# How long the listen loops wait before polling a connection again when it had no message for us. Polling much faster
+# than this only burns CPU, since MAVLink traffic is at most a few hundred messages per second. This is also the added
+# latency for the first message after a quiet period, i.e. up to 1 ms for commands and setpoints from the GCS side,
+# which is the local MAVSDK server.
+IDLE_POLL_INTERVAL = 0.001
+# On the drone side, the wait doubles for every consecutive empty poll up to MAX_IDLE_POLL_INTERVAL and drops back as
+# soon as a message arrives, so a message after a quiet period can be delayed by up to 10 ms. The GCS side always polls
+# at IDLE_POLL_INTERVAL, as its messages are our own commands and shouldn't wait.
+MAX_IDLE_POLL_INTERVAL = 0.01
+# Maximum number of messages the listen loops forward in a row before yielding to the event loop during bursts.
+MAX_MESSAGES_PER_YIELD = 20
+
 
 class MAVPassthrough:
     def __init__(self, dialect=None, loggername="passthrough", log_messages=True):
@@ -34,9 +46,7 @@ class MAVPassthrough:
         self.logger = logging.getLogger(loggername)
         self.logger.setLevel(logging.DEBUG)
         filename = f"{loggername}_{datetime.datetime.now()}"
-        filename = filename.replace(":", "_").replace(".", "_") + ".log"
-        logdir = os.path.abspath("./logs")
-        os.makedirs(logdir, exist_ok=True)
+        filename = filename.translate(filename_translation) + ".log"
         file_handler = logging.FileHandler(os.path.join(logdir, filename))
         file_handler.setLevel(logging.DEBUG)
         file_handler.setFormatter(common_formatter)
@@ -49,13 +59,13 @@ class MAVPassthrough:
         self.should_stop = False
 
     def connect_gcs(self, address):
-        self.running_tasks.add(asyncio.create_task(self._connect_gcs(address)))
+        start_task(self._connect_gcs(address), self.running_tasks)
 
     async def _connect_gcs(self, address):
         self.con_gcs = mavutil.mavlink_connection("udpout:" + address,
                                                   source_system=self.source_system,
                                                   source_component=self.source_component, dialect=self.dialect)
-        self.running_tasks.add(asyncio.create_task(self._send_heartbeats_gsc()))
+        start_task(self._send_heartbeats_gsc(), self.running_tasks)
         await asyncio.sleep(0)
         self.logger.debug("Waiting for GCS heartbeat")
         gcs_heartbeat = self.con_gcs.wait_heartbeat(blocking=False)
@@ -66,37 +76,38 @@ class MAVPassthrough:
         self.gcs_component = gcs_heartbeat.get_srcComponent()
         self.logger.debug(f"Got GCS {self.gcs_system, self.gcs_component} heartbeat.")
         self.time_of_last_gcs = time.time_ns()
-        self.running_tasks.add(asyncio.create_task(self._send_pings_gcs()))
-        self.running_tasks.add(asyncio.create_task(self._listen_gcs()))
+        start_task(self._send_pings_gcs(), self.running_tasks)
+        start_task(self._listen_gcs(), self.running_tasks)
 
     def connect_drone(self, loc, appendix, scheme="udp"):
         if scheme == "udp":
-            self.running_tasks.add(asyncio.create_task(self._connect_drone_udp(loc, appendix)))
+            start_task(self._connect_drone_udp(loc, appendix), self.running_tasks)
         elif scheme == "serial":
-            self.running_tasks.add(asyncio.create_task(self._connect_drone_serial(loc, appendix)))
+            start_task(self._connect_drone_serial(loc, appendix), self.running_tasks)
 
     async def _connect_drone_serial(self, path, baud):
         try:
             self.logger.debug(f"Connecting to drone @{path}:{baud}")
 
-            tmp_con_drone_in = mavutil.mavlink_connection(f"{path}",
-                                                          baud=baud,
-                                                          source_system=self.source_system,
-                                                          source_component=self.source_component,
-                                                          dialect=self.dialect)
+            # Opening a serial port blocks until the OS hands it over, so keep it off the event loop.
+            tmp_con_drone_in = await asyncio.to_thread(mavutil.mavlink_connection, f"{path}",
+                                                       baud=baud,
+                                                       source_system=self.source_system,
+                                                       source_component=self.source_component,
+                                                       dialect=self.dialect)
 
             await self._process_initial_drone_connection(tmp_con_drone_in)
             tmp_con_drone_in.close()
 
-            self.con_drone_in = mavutil.mavlink_connection(f"{path}",
-                                                           baud=baud,
-                                                           source_system=self.source_system,
-                                                           source_component=self.source_component,
-                                                           dialect=self.dialect)
+            self.con_drone_in = await asyncio.to_thread(mavutil.mavlink_connection, f"{path}",
+                                                        baud=baud,
+                                                        source_system=self.source_system,
+                                                        source_component=self.source_component,
+                                                        dialect=self.dialect)
 
-            self.running_tasks.add(asyncio.create_task(self._send_pings_drone()))
-            self.running_tasks.add(asyncio.create_task(self._listen_drone()))
-            self.running_tasks.add(asyncio.create_task(self._send_heartbeats_drone()))
+            start_task(self._send_pings_drone(), self.running_tasks)
+            start_task(self._listen_drone(), self.running_tasks)
+            start_task(self._send_heartbeats_drone(), self.running_tasks)
         except Exception as e:
             self.logger.debug(f"Error during connection to drone: {repr(e)}", exc_info=True)
 
@@ -123,9 +134,9 @@ class MAVPassthrough:
                                                            source_system=self.source_system,
                                                            source_component=self.source_component, dialect=self.dialect)
 
-            self.running_tasks.add(asyncio.create_task(self._send_pings_drone()))
-            self.running_tasks.add(asyncio.create_task(self._listen_drone()))
-            self.running_tasks.add(asyncio.create_task(self._send_heartbeats_drone()))
+            start_task(self._send_pings_drone(), self.running_tasks)
+            start_task(self._listen_drone(), self.running_tasks)
+            start_task(self._send_heartbeats_drone(), self.running_tasks)
         except Exception as e:
             self.logger.debug(f"Error during connection to drone: {repr(e)}", exc_info=True)
 
@@ -204,27 +215,37 @@ class MAVPassthrough:
         self.logger.debug("Starting to listen to GCS")
         while not self.should_stop:
             if self.con_gcs is not None:
+                burst = 0
                 while not self.should_stop:
                     # Receive and log all messages from the GCS
                     msg = self.con_gcs.recv_match(blocking=False)
                     if msg is None:
-                        await asyncio.sleep(0.0001)
+                        burst = 0
+                        await asyncio.sleep(IDLE_POLL_INTERVAL)
                     else:
+                        burst += 1
+                        if burst >= MAX_MESSAGES_PER_YIELD:
+                            # Don't starve the rest of the app while a backlog of messages is being forwarded
+                            burst = 0
+                            await asyncio.sleep(0)
+                        src_system = msg.get_srcSystem()
+                        src_component = msg.get_srcComponent()
                         if self.log_messages:
-                            self.logger.debug(f"Message from GCS {msg.get_srcSystem(), msg.get_srcComponent()}, "
+                            self.logger.debug(f"Message from GCS {src_system, src_component}, "
                                               f"{msg.to_dict()}")
                         self.time_of_last_gcs = time.time_ns()
                         if self.con_drone_in is not None and self.connected_to_gcs():  # Send onward to the drone
-                            self.con_drone_in.mav.srcSystem = msg.get_srcSystem()
-                            self.con_drone_in.mav.srcComponent = msg.get_srcComponent()
+                            mav = self.con_drone_in.mav
+                            mav.srcSystem = src_system
+                            mav.srcComponent = src_component
                             if self._process_message_for_return(msg):
                                 try:
-                                    self.con_drone_in.mav.send(msg)
+                                    mav.send(msg)
                                 except Exception as e:
                                     self.logger.debug(f"Encountered an exception sending message to drone: "
                                                       f"{repr(e)}", exc_info=True)
-                            self.con_drone_in.mav.srcSystem = self.source_system
-                            self.con_drone_in.mav.srcComponent = self.source_component
+                            mav.srcSystem = self.source_system
+                            mav.srcComponent = self.source_component
             else:
                 await asyncio.sleep(1)
 
@@ -232,27 +253,40 @@ class MAVPassthrough:
         self.logger.debug("Starting to listen to drone")
         while not self.should_stop:
             if self.con_drone_in is not None:
+                burst = 0
+                idle_wait = IDLE_POLL_INTERVAL
                 while not self.should_stop:
                     # Receive and log all messages from the GCS
                     msg = self.con_drone_in.recv_match(blocking=False)
                     if msg is None:
-                        await asyncio.sleep(0.0001)
+                        burst = 0
+                        await asyncio.sleep(idle_wait)
+                        idle_wait = min(idle_wait * 2, MAX_IDLE_POLL_INTERVAL)
                     else:
+                        idle_wait = IDLE_POLL_INTERVAL
+                        burst += 1
+                        if burst >= MAX_MESSAGES_PER_YIELD:
+                            # Don't starve the rest of the app while a backlog of messages is being forwarded
+                            burst = 0
+                            await asyncio.sleep(0)
+                        src_system = msg.get_srcSystem()
+                        src_component = msg.get_srcComponent()
                         if self.log_messages:
-                            self.logger.debug(f"Message from Drone {msg.get_srcSystem(), msg.get_srcComponent()}, "
+                            self.logger.debug(f"Message from Drone {src_system, src_component}, "
                                               f"{msg.to_dict()}")
                         self.time_of_last_drone = time.time_ns()
                         if self.con_gcs is not None and self.connected_to_drone():
-                            self.con_gcs.mav.srcSystem = msg.get_srcSystem()
-                            self.con_gcs.mav.srcComponent = msg.get_srcComponent()
+                            mav = self.con_gcs.mav
+                            mav.srcSystem = src_system
+                            mav.srcComponent = src_component
                             if self._process_message_for_return(msg):
                                 try:
-                                    self.con_gcs.mav.send(msg)
+                                    mav.send(msg)
                                 except Exception as e:
                                     self.logger.debug(f"Encountered an exception sending message to GCS: {repr(e)}",
                                                       exc_info=True)
-                            self.con_gcs.mav.srcSystem = self.source_system
-                            self.con_gcs.mav.srcComponent = self.source_component
+                            mav.srcSystem = self.source_system
+                            mav.srcComponent = self.source_component
             else:
                 await asyncio.sleep(1)
 
@@ -280,7 +314,6 @@ class MAVPassthrough:
             self.logger.debug("Sending heartbeat to GCS")
             self.con_gcs.mav.heartbeat_send(mavutil.mavlink.MAV_TYPE_GCS,
                                             mavutil.mavlink.MAV_AUTOPILOT_INVALID, 0, 0, 0)
-            self.logger.debug(f"GCS connection target system {self.con_gcs.target_system}")
             await asyncio.sleep(0.5)
 
     async def stop(self):
@@ -3,9 +3,10 @@
 Plugins extend the functionality of DroneManager or Drone Classes by providing extra functions. They can also register
 their own commands to the CLI.
 """
-import asyncio
 from abc import ABC, abstractmethod
 
+from dronecontrol.utils import start_task
+
 
 # TODO: Figure out scheduling
 #   Have to interact with drone queues ("Move to position X, then turn gimbal, then move to position Y)
@@ -32,11 +33,11 @@ class Plugin(ABC):
         self.logger = logger.getChild(self.__class__.__name__)
         self.cli_commands = {}
         self.background_functions = []
-        self._running_tasks = []
+        self._running_tasks = set()
 
     def start_background_functions(self):
         for coro in self.background_functions:
-            self._running_tasks.append(asyncio.create_task(coro))
+            start_task(coro, self._running_tasks)
 
     @abstractmethod
     async def start(self):
@@ -1,4 +1,6 @@
+import asyncio
 import math
+import os
 from urllib.parse import urlparse
 import numpy as np
 import logging
@@ -10,6 +12,12 @@ from haversine import inverse_haversine, haversine, Direction, Unit, haversine_v
 
 common_formatter = logging.Formatter('%(asctime)s.%(msecs)03d %(levelname)s %(name)s - %(message)s', datefmt="%H:%M:%S")
 
+# Replaces the characters from datetime strings that aren't allowed in file names on all platforms.
+filename_translation = str.maketrans(":.", "__")
+
+logdir = os.path.abspath("./logs")
+os.makedirs(logdir, exist_ok=True)
+
 
 def dist_ned(pos1, pos2):
     return np.sqrt(np.sum((pos1 - pos2) ** 2, axis=0))
@@ -28,6 +36,11 @@ def heading_ned(pos1, pos2):
     return math.atan2(pos2[1] - pos1[1], pos2[0] - pos1[0]) / math.pi * 180
 
 
+def heading_difference(heading1, heading2):
+    """ Signed difference heading1 - heading2 in degrees, wrapped to the range -180 to +180."""
+    return (heading1 - heading2 + 180) % 360 - 180
+
+
 def heading_gps(gps1, gps2):
     """ Heading between GPS coordinates, going from -180 to +180 with 0 straight north.
 
@@ -50,6 +63,18 @@ def relative_gps(north, east, up, lat, long, alt):
     return target_lat, target_long, target_alt
 
 
+def start_task(aw, running_tasks: set) -> asyncio.Task:
+    """ Schedule a coroutine (or take an existing task) and keep it in running_tasks until it finishes.
+
+    The event loop only keeps weak references to tasks, so background tasks need to be stored somewhere. Finished tasks
+    remove themselves from the set.
+    """
+    task = asyncio.ensure_future(aw)
+    running_tasks.add(task)
+    task.add_done_callback(running_tasks.discard)
+    return task
+
+
 def get_free_port():
     """ Get a free network port.
 
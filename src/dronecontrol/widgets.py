@@ -96,11 +96,14 @@ class InputWithHistory(Input):
 
 class DroneOverview(Static):
 
-    COLUMN_NAMES = ["Name", "Status", "Modes", "GPS", "Local", "Vel", "Yaw/Bat"]
-    COLUMN_WIDTHS = [10, 11, 11, 16, 9, 9, 8]
-    COLUMN_ALIGN = ["<", ">", ">", ">", ">", ">", ">"]
+    COLUMN_NAMES = ("Name", "Status", "Modes", "GPS", "Local", "Vel", "Yaw/Bat")
+    COLUMN_WIDTHS = (10, 11, 11, 16, 9, 9, 8)
+    COLUMN_ALIGN = ("<", ">", ">", ">", ">", ">", ">")
     COLUMN_SPACING = 3
 
+    FIXTYPE_COLORS = {FixType.NO_FIX: "red", FixType.RTK_FIXED: "green", FixType.RTK_FLOAT: "green"}
+    # All other fix types are shown in yellow
+
     def __init__(self, drone, update_frequency, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.drone = drone
@@ -110,6 +113,8 @@ class DroneOverview(Static):
                                for i in range(len(self.COLUMN_NAMES))]
         self.spacer = " "*self.COLUMN_SPACING
         self.format_string = self.spacer.join(self.column_formats)
+        self._last_text: Text | None = None
+        self._update_task: asyncio.Task | None = None
 
     @classmethod
     def header_string(cls):
@@ -122,7 +127,15 @@ class DroneOverview(Static):
         return (len(cls.COLUMN_NAMES)-1)*cls.COLUMN_SPACING + sum(cls.COLUMN_WIDTHS)
 
     def on_mount(self) -> None:
-        asyncio.create_task(self.update_display())
+        # Only ever run one update loop per widget, even if it gets mounted again
+        if self._update_task is None or self._update_task.done():
+            self._update_task = asyncio.create_task(self.update_display())
+
+    def on_unmount(self) -> None:
+        # Stop updating once the widget is removed, i.e. when its drone disconnects
+        if self._update_task is not None:
+            self._update_task.cancel()
+            self._update_task = None
 
     def _text_name(self):
         string = self.column_formats[0].format(self.drone.name)
@@ -143,11 +156,7 @@ class DroneOverview(Static):
         return Text(string, style=f"bold {color}")
 
     def _text_fixtype(self):
-        color = "yellow"
-        if self.drone.fix_type == FixType.NO_FIX:
-            color = "red"
-        elif self.drone.fix_type in [FixType.RTK_FIXED, FixType.RTK_FLOAT]:
-            color = "green"
+        color = self.FIXTYPE_COLORS.get(self.drone.fix_type, "yellow")
         string = self.column_formats[2].format(str(self.drone.fix_type))
         return Text(string, style=f"bold {color}")
 
@@ -161,97 +170,99 @@ class DroneOverview(Static):
         string = self.column_formats[1].format(f"Air: {str(self.drone.in_air):>{self.COLUMN_WIDTHS[1]-5}}")
         return Text(string, style=f"bold {color}")
 
-    def _text_lat(self):
-        string = self.column_formats[3].format(f"LAT: {self.drone.position_global[0]:{self.COLUMN_WIDTHS[3]-6}.6f}")
+    def _text_lat(self, position_global):
+        string = self.column_formats[3].format(f"LAT: {position_global[0]:{self.COLUMN_WIDTHS[3]-6}.6f}")
         return Text(string, style=f"bold")
 
-    def _text_long(self):
-        string = self.column_formats[3].format(f"LONG: {self.drone.position_global[1]:{self.COLUMN_WIDTHS[3] - 6}.6f}")
+    def _text_long(self, position_global):
+        string = self.column_formats[3].format(f"LONG: {position_global[1]:{self.COLUMN_WIDTHS[3] - 6}.6f}")
         return Text(string, style=f"bold")
 
-    def _text_amsl(self):
-        string = self.column_formats[3].format(f"AMSL: {self.drone.position_global[2]:{self.COLUMN_WIDTHS[3] - 6}.2f}")
+    def _text_amsl(self, position_global):
+        string = self.column_formats[3].format(f"AMSL: {position_global[2]:{self.COLUMN_WIDTHS[3] - 6}.2f}")
         return Text(string, style=f"bold")
 
-    def _text_p_north(self):
-        string = self.column_formats[4].format(f"N: {self.drone.position_ned[0]:{self.COLUMN_WIDTHS[4]-3}.3f}")
+    def _text_p_north(self, position_ned):
+        string = self.column_formats[4].format(f"N: {position_ned[0]:{self.COLUMN_WIDTHS[4]-3}.3f}")
         return Text(string, style=f"bold")
 
-    def _text_p_east(self):
-        string = self.column_formats[4].format(f"E: {self.drone.position_ned[1]:{self.COLUMN_WIDTHS[4]-3}.3f}")
+    def _text_p_east(self, position_ned):
+        string = self.column_formats[4].format(f"E: {position_ned[1]:{self.COLUMN_WIDTHS[4]-3}.3f}")
         return Text(string, style=f"bold")
 
-    def _text_p_down(self):
-        string = self.column_formats[4].format(f"D: {self.drone.position_ned[2]:{self.COLUMN_WIDTHS[4]-3}.3f}")
+    def _text_p_down(self, position_ned):
+        string = self.column_formats[4].format(f"D: {position_ned[2]:{self.COLUMN_WIDTHS[4]-3}.3f}")
         return Text(string, style=f"bold")
 
-    def _text_v_north(self):
-        string = self.column_formats[5].format(f"N: {self.drone.velocity[0]:{self.COLUMN_WIDTHS[5]-3}.3f}")
+    def _text_v_north(self, velocity):
+        string = self.column_formats[5].format(f"N: {velocity[0]:{self.COLUMN_WIDTHS[5]-3}.3f}")
         return Text(string, style=f"bold")
 
-    def _text_v_east(self):
-        string = self.column_formats[5].format(f"E: {self.drone.velocity[1]:{self.COLUMN_WIDTHS[5]-3}.3f}")
+    def _text_v_east(self, velocity):
+        string = self.column_formats[5].format(f"E: {velocity[1]:{self.COLUMN_WIDTHS[5]-3}.3f}")
         return Text(string, style=f"bold")
 
-    def _text_v_down(self):
-        string = self.column_formats[5].format(f"D: {self.drone.velocity[2]:{self.COLUMN_WIDTHS[5]-3}.3f}")
+    def _text_v_down(self, velocity):
+        string = self.column_formats[5].format(f"D: {velocity[2]:{self.COLUMN_WIDTHS[5]-3}.3f}")
         return Text(string, style="bold")
 
     def _text_yaw(self):
         string = self.column_formats[6].format(f"Y: {self.drone.attitude[2]:{self.COLUMN_WIDTHS[6]-3}.1f}")
         return Text(string, style="bold")
 
-    def _text_bat_remain(self):
+    def _text_bat_remain(self, battery):
         color = "white"
         battery_remaining = math.nan
-        try:
-            battery_remaining = self.drone.batteries[0].remaining
+        if battery is not None:
+            battery_remaining = battery.remaining
             if battery_remaining > 66:
                 color = "green"
             elif battery_remaining > 33:
                 color = "yellow"
             else:
                 color = "red"
-        except KeyError:
-            pass
         string = self.column_formats[6].format(f"{battery_remaining:{self.COLUMN_WIDTHS[6]-1}.0f}%")
         return Text(string, style=f"bold {color}")
 
-    def _text_bat_volt(self):
-        battery_voltage = math.nan
-        try:
-            battery_voltage = self.drone.batteries[0].voltage
-        except KeyError:
-            pass
+    def _text_bat_volt(self, battery):
+        battery_voltage = math.nan if battery is None else battery.voltage
         string = self.column_formats[6].format(f"{battery_voltage:{self.COLUMN_WIDTHS[6]-1}.2f}V")
         return Text(string, style="bold")
 
     async def update_display(self):
         while True:
             try:
+                drone = self.drone
+                position_global = drone.position_global
+                position_ned = drone.position_ned
+                velocity = drone.velocity
+                battery = drone.batteries.get(0)
                 text_output = Text.assemble(self._text_empty(0), self.spacer,
                                             self._text_connect(), self.spacer,
                                             self._text_flightmode(), self.spacer,
-                                            self._text_lat(), self.spacer,
-                                            self._text_p_north(), self.spacer,
-                                            self._text_v_north(), self.spacer,
+                                            self._text_lat(position_global), self.spacer,
+                                            self._text_p_north(position_ned), self.spacer,
+                                            self._text_v_north(velocity), self.spacer,
                                             self._text_yaw(), "\n",
                                             self._text_name(), self.spacer,
                                             self._text_armed(), self.spacer,
                                             self._text_fixtype(), self.spacer,
-                                            self._text_long(), self.spacer,
-                                            self._text_p_east(), self.spacer,
-                                            self._text_v_east(), self.spacer,
-                                            self._text_bat_remain(), "\n",
+                                            self._text_long(position_global), self.spacer,
+                                            self._text_p_east(position_ned), self.spacer,
+                                            self._text_v_east(velocity), self.spacer,
+                                            self._text_bat_remain(battery), "\n",
                                             self._text_empty(0), self.spacer,
                                             self._text_airborne(), self.spacer,
                                             self._text_empty(2), self.spacer,
-                                            self._text_amsl(), self.spacer,
-                                            self._text_p_down(), self.spacer,
-                                            self._text_v_down(), self.spacer,
-                                            self._text_bat_volt(), "\n",
+                                            self._text_amsl(position_global), self.spacer,
+                                            self._text_p_down(position_ned), self.spacer,
+                                            self._text_v_down(velocity), self.spacer,
+                                            self._text_bat_volt(battery), "\n",
                                             )
-                self.update(text_output)
+                # Skip the refresh if nothing visible changed, i.e. the drone is sitting still on the ground.
+                if text_output != self._last_text:
+                    self._last_text = text_output
+                    self.update(text_output)
             except Exception as e:
                 self.logger.debug(f"Exception updating status pane for drone {self.drone.name}: {repr(e)}",
                                   exc_info=True)